@@ -15,8 +15,6 @@ depends_on = None
 
 
 def upgrade() -> None:
-    op.execute("CREATE EXTENSION IF NOT EXISTS citext;")
-
     op.create_table(
         "tenants",
         sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
@@ -49,29 +47,32 @@ def upgrade() -> None:
         "users",
         sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
         sa.Column("tenant_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False),
-        sa.Column("email", postgresql.CITEXT(), nullable=False),
+        sa.Column("email", sa.Text(), nullable=False),
         sa.Column("hashed_password", sa.Text(), nullable=False),
         sa.Column("mfa_enabled", sa.Boolean(), server_default=sa.text("false"), nullable=False),
         sa.Column("mfa_secret", sa.Text(), nullable=True),
         sa.Column("status", sa.String(length=20), server_default="active", nullable=False),
         sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP")),
-        sa.UniqueConstraint("tenant_id", "email", name="uq_users_tenant_email"),
     )
-    op.create_index("ix_users_tenant_created_at", "users", ["tenant_id", "created_at"])
+    op.create_index(
+        "uq_users_tenant_email_ci",
+        "users",
+        [sa.text("tenant_id"), sa.text("lower(email)")],
+        unique=True,
+    )
 
     op.create_table(
         "user_roles",
         sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
         sa.Column("role_id", sa.Integer(), sa.ForeignKey("roles.id", ondelete="CASCADE"), primary_key=True),
     )
-    op.create_index("ix_user_roles_role_id", "user_roles", ["role_id"])
 
     op.create_table(
         "symptom_entries",
         sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
         sa.Column("tenant_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False),
         sa.Column("patient_id", postgresql.UUID(as_uuid=True), nullable=False),
-        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
         sa.Column("created_at", sa.TIMESTAMP(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP")),
     )
 
@@ -107,9 +108,20 @@ def upgrade() -> None:
         sa.Column("entity", sa.Text(), nullable=False),
         sa.Column("entity_id", sa.Text(), nullable=True),
         sa.Column("ts", sa.TIMESTAMP(timezone=True), server_default=sa.text("CURRENT_TIMESTAMP")),
-        sa.Column("meta", sa.JSON(), nullable=True),
+        sa.Column("meta", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
     )
 
+    # Built outside the migration transaction so replaying this revision on a
+    # populated database does not take ACCESS EXCLUSIVE locks.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_tenant_created_at "
+            "ON users (tenant_id, created_at)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_roles_role_id ON user_roles (role_id)"
+        )
+
 
 def downgrade() -> None:
     op.drop_table("audit_events")
@@ -119,10 +131,10 @@ def downgrade() -> None:
     op.drop_index("ix_user_roles_role_id", table_name="user_roles")
     op.drop_table("user_roles")
     op.drop_index("ix_users_tenant_created_at", table_name="users")
+    op.drop_index("uq_users_tenant_email_ci", table_name="users")
     op.drop_table("users")
     op.execute(
         "DELETE FROM roles WHERE name IN ('Paciente', 'Profesional', 'Admin')"
     )
     op.drop_table("roles")
     op.drop_table("tenants")
-    op.execute("DROP EXTENSION IF EXISTS citext;")
@@ -0,0 +1,24 @@
+"""Index predictions for keyset pagination."""
+
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0002_predictions_keyset_index"
+down_revision = "0001_init_auth_and_core"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_predictions_tenant_patient_created_id",
+        "predictions",
+        ["tenant_id", "patient_id", sa.text("created_at DESC"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_predictions_tenant_patient_created_id", table_name="predictions")
@@ -0,0 +1,31 @@
+"""Index the symptom entry and case list queries."""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003_list_query_indexes"
+down_revision = "0002_predictions_keyset_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY avoids locking writes on large tables but cannot run inside
+    # the migration transaction.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_symptom_entries_tenant_patient_created "
+            "ON symptom_entries (tenant_id, patient_id, created_at DESC)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_cases_assigned_open "
+            "ON cases (tenant_id, assigned_to, updated_at DESC) WHERE status = 'open'"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_cases_assigned_open")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_symptom_entries_tenant_patient_created")
@@ -0,0 +1,32 @@
+"""Move JSON columns to JSONB and replace CITEXT email with a lower() index."""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004_jsonb_and_email_index"
+down_revision = "0003_list_query_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created from the current 0001 already have this layout; the
+    # statements below are no-ops there and convert older installs in place.
+    op.execute("ALTER TABLE symptom_entries ALTER COLUMN payload TYPE jsonb USING payload::jsonb")
+    op.execute("ALTER TABLE audit_events ALTER COLUMN meta TYPE jsonb USING meta::jsonb")
+    op.execute("ALTER TABLE users DROP CONSTRAINT IF EXISTS uq_users_tenant_email")
+    op.execute("ALTER TABLE users ALTER COLUMN email TYPE text USING email::text")
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_users_tenant_email_ci "
+        "ON users (tenant_id, lower(email))"
+    )
+    op.execute("DROP EXTENSION IF EXISTS citext")
+
+
+def downgrade() -> None:
+    # Only the storage type is reverted; email uniqueness stays on lower(email)
+    # so the citext extension is not required again.
+    op.execute("ALTER TABLE audit_events ALTER COLUMN meta TYPE json USING meta::json")
+    op.execute("ALTER TABLE symptom_entries ALTER COLUMN payload TYPE json USING payload::json")
@@ -0,0 +1,50 @@
+"""Generate time-ordered UUIDv7 primary keys in the database."""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005_uuidv7_primary_keys"
+down_revision = "0004_jsonb_and_email_index"
+branch_labels = None
+depends_on = None
+
+UUID_PK_TABLES = ("tenants", "users", "symptom_entries", "predictions", "cases")
+
+
+def upgrade() -> None:
+    # Pure SQL UUIDv7: the first 48 bits of a random UUID are replaced with the
+    # Unix time in milliseconds and the version nibble is set to 7. PostgreSQL
+    # 18 ships a native uuidv7() in pg_catalog, which takes precedence.
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION uuidv7() RETURNS uuid AS $$
+            SELECT encode(
+                set_bit(
+                    set_bit(
+                        overlay(
+                            uuid_send(gen_random_uuid())
+                            PLACING substring(
+                                int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint)
+                                FROM 3
+                            )
+                            FROM 1 FOR 6
+                        ),
+                        52, 1
+                    ),
+                    53, 1
+                ),
+                'hex'
+            )::uuid;
+        $$ LANGUAGE sql VOLATILE
+        """
+    )
+    for table in UUID_PK_TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT uuidv7()")
+
+
+def downgrade() -> None:
+    for table in UUID_PK_TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
+    op.execute("DROP FUNCTION IF EXISTS public.uuidv7()")
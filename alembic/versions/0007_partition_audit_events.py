@@ -0,0 +1,142 @@
+"""Partition audit_events by month on ts."""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007_partition_audit_events"
+down_revision = "0006_jsonb_gin_indexes"
+branch_labels = None
+depends_on = None
+
+AUDIT_COLUMNS = "id, tenant_id, actor_sub, action, entity, entity_id, ts, meta"
+
+
+def upgrade() -> None:
+    # A partitioned table's primary key must include the partition key, and an
+    # existing table cannot be converted in place: rebuild it and copy the rows.
+    op.execute("ALTER TABLE audit_events RENAME TO audit_events_legacy")
+    op.execute("ALTER INDEX audit_events_pkey RENAME TO audit_events_legacy_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_audit_events_meta_gin")
+    op.execute("ALTER SEQUENCE audit_events_id_seq OWNED BY NONE")
+
+    op.execute(
+        """
+        CREATE TABLE audit_events (
+            id integer NOT NULL DEFAULT nextval('audit_events_id_seq'),
+            tenant_id uuid NOT NULL,
+            actor_sub uuid NOT NULL,
+            action text NOT NULL,
+            entity text NOT NULL,
+            entity_id text,
+            ts timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            meta jsonb,
+            PRIMARY KEY (id, ts)
+        ) PARTITION BY RANGE (ts)
+        """
+    )
+    op.execute("ALTER SEQUENCE audit_events_id_seq OWNED BY audit_events.id")
+
+    # Schedule monthly (pg_cron or an external cron) ahead of time, e.g.
+    # SELECT create_audit_events_partition((now() + interval '1 month')::date);
+    # If the schedule lapses, that month's rows land in audit_events_default and
+    # a plain CREATE ... PARTITION OF would fail on them. Calling the function
+    # for the missed month then detaches the default partition, creates the
+    # monthly one, moves the rows and reattaches the default, all in the
+    # caller's transaction. It locks audit_events while it does so.
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION create_audit_events_partition(month date) RETURNS void AS $$
+        DECLARE
+            start_at date := date_trunc('month', month)::date;
+            end_at date := (date_trunc('month', month) + interval '1 month')::date;
+            partition_name text := 'audit_events_' || to_char(start_at, 'YYYY_MM');
+            create_sql text := format(
+                'CREATE TABLE %I PARTITION OF audit_events FOR VALUES FROM (%L) TO (%L)',
+                partition_name, start_at, end_at
+            );
+        BEGIN
+            IF to_regclass(partition_name) IS NOT NULL THEN
+                RETURN;
+            END IF;
+            -- Nested so the default partition is only looked up once it exists.
+            IF to_regclass('audit_events_default') IS NOT NULL THEN
+                IF EXISTS (SELECT 1 FROM audit_events_default WHERE ts >= start_at AND ts < end_at) THEN
+                    ALTER TABLE audit_events DETACH PARTITION audit_events_default;
+                    EXECUTE create_sql;
+                    EXECUTE format(
+                        'INSERT INTO %I ({AUDIT_COLUMNS}) SELECT {AUDIT_COLUMNS} '
+                        'FROM audit_events_default WHERE ts >= %L AND ts < %L',
+                        partition_name, start_at, end_at
+                    );
+                    DELETE FROM audit_events_default WHERE ts >= start_at AND ts < end_at;
+                    ALTER TABLE audit_events ATTACH PARTITION audit_events_default DEFAULT;
+                    RETURN;
+                END IF;
+            END IF;
+            EXECUTE create_sql;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    # Cover every month that already has events plus the next two, so the
+    # copied rows land in monthly partitions rather than the default one.
+    op.execute(
+        """
+        SELECT create_audit_events_partition(month::date)
+        FROM generate_series(
+            date_trunc('month', COALESCE((SELECT min(ts) FROM audit_events_legacy), CURRENT_TIMESTAMP)),
+            date_trunc('month', CURRENT_TIMESTAMP) + interval '2 months',
+            interval '1 month'
+        ) AS month
+        """
+    )
+    op.execute("CREATE TABLE audit_events_default PARTITION OF audit_events DEFAULT")
+
+    op.execute(
+        f"""
+        INSERT INTO audit_events ({AUDIT_COLUMNS})
+        SELECT id, tenant_id, actor_sub, action, entity, entity_id,
+               COALESCE(ts, CURRENT_TIMESTAMP), meta
+        FROM audit_events_legacy
+        """
+    )
+    op.execute("DROP TABLE audit_events_legacy")
+
+    # Partitioned indexes cannot be built CONCURRENTLY; the table is new here.
+    op.execute(
+        "CREATE INDEX ix_audit_events_meta_gin ON audit_events USING gin (meta jsonb_path_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE audit_events RENAME TO audit_events_partitioned")
+    op.execute("ALTER INDEX audit_events_pkey RENAME TO audit_events_partitioned_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_audit_events_meta_gin")
+    op.execute("ALTER SEQUENCE audit_events_id_seq OWNED BY NONE")
+
+    op.execute(
+        """
+        CREATE TABLE audit_events (
+            id integer NOT NULL DEFAULT nextval('audit_events_id_seq') PRIMARY KEY,
+            tenant_id uuid NOT NULL,
+            actor_sub uuid NOT NULL,
+            action text NOT NULL,
+            entity text NOT NULL,
+            entity_id text,
+            ts timestamptz DEFAULT CURRENT_TIMESTAMP,
+            meta jsonb
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE audit_events_id_seq OWNED BY audit_events.id")
+    op.execute(
+        f"INSERT INTO audit_events ({AUDIT_COLUMNS}) "
+        f"SELECT {AUDIT_COLUMNS} FROM audit_events_partitioned"
+    )
+    op.execute("DROP TABLE audit_events_partitioned")
+    op.execute("DROP FUNCTION IF EXISTS create_audit_events_partition(date)")
+    op.execute(
+        "CREATE INDEX ix_audit_events_meta_gin ON audit_events USING gin (meta jsonb_path_ops)"
+    )
@@ -0,0 +1,32 @@
+"""Cover the predictions list query with an INCLUDE index."""
+
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0008_predictions_covering_index"
+down_revision = "0007_partition_audit_events"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Same keys as the keyset index from 0002, which it replaces; the INCLUDE
+    # columns let GET /predictions be answered by an index-only scan.
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_predictions_tenant_patient_ts "
+            "ON predictions (tenant_id, patient_id, created_at DESC, id DESC) "
+            "INCLUDE (symptom_entry_id, model_version, score, label)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_predictions_tenant_patient_created_id")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_predictions_tenant_patient_created_id "
+            "ON predictions (tenant_id, patient_id, created_at DESC, id DESC)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_predictions_tenant_patient_ts")
@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
+import base64
+import hashlib
 import json
 import os
-from typing import Any, Dict
-
+import threading
+import time
+from typing import Any, Dict, Tuple, Union
+from uuid import UUID
+
+import jwt
+import orjson
+from cachetools import TTLCache
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt
-from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
 
 
 HTTP_BEARER = HTTPBearer(auto_error=True)
@@ -17,11 +24,24 @@ HTTP_BEARER = HTTPBearer(auto_error=True)
 ISSUER = os.getenv("JWT_ISSUER", "http://localhost:8000")
 AUDIENCE = os.getenv("JWT_AUDIENCE", "aiddiag-api")
 JWKS_PATH = os.getenv("JWT_PUBLIC_JWKS_PATH", "app/static/jwks.json")
-ALLOWED_ALGORITHMS: tuple[str, ...] = ("RS256",)
+ALLOWED_ALGORITHMS: tuple[str, ...] = ("RS256", "EdDSA")
+
+# Verified claims are reused for repeated bearer tokens; entries never outlive
+# the token's own ``exp``.
+TOKEN_CACHE_TTL_SECONDS = 30
+TOKEN_CACHE_MAXSIZE = 10_000
+
+REQUIRED_CLAIMS: tuple[str, ...] = ("sub", "tenant_id", "role", "scope")
+_DECODE_OPTIONS: Dict[str, Any] = {
+    "verify_aud": True,
+    "verify_iss": True,
+    "verify_exp": True,
+    "require": ["aud", "iss", "exp", *REQUIRED_CLAIMS],
+}
 
 
 def _load_jwks() -> Dict[str, Any]:
-    """Load the JWKS from the configured location."""
+    """Read the JWKS document from the configured location."""
 
     if not os.path.exists(JWKS_PATH):
         raise RuntimeError(f"JWKS file not found at {JWKS_PATH}")
@@ -29,76 +49,176 @@ def _load_jwks() -> Dict[str, Any]:
         return json.load(handler)
 
 
-def _jwks_by_kid() -> Dict[str, Dict[str, Any]]:
-    """Return the JWKS indexed by key id for quick lookup."""
+def _index_by_kid(jwks: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {k["kid"]: k for k in jwks.get("keys", []) if "kid" in k}
+
+
+def _render_jwks(jwks: Dict[str, Any]) -> tuple[bytes, str]:
+    """Serialize the JWKS for the public endpoint along with its ETag."""
+
+    body = orjson.dumps(jwks)
+    return body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+
+
+def _b64url_decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _b64url_to_int(value: str) -> int:
+    return int.from_bytes(_b64url_decode(value), "big")
+
+
+PublicKey = Union[rsa.RSAPublicKey, ed25519.Ed25519PublicKey]
+
+
+def _build_public_keys(jwks_by_kid: Dict[str, Dict[str, Any]]) -> Dict[str, Tuple[PublicKey, str]]:
+    """Construct the public key object and algorithm for every usable JWK.
+
+    Building a key object runs OpenSSL's parameter validation, so it is done
+    once here rather than on every token verification. Each key is pinned to
+    its JWK ``alg`` so a token header cannot select a different algorithm.
+    """
+
+    keys: Dict[str, Tuple[PublicKey, str]] = {}
+    for kid, jwk in jwks_by_kid.items():
+        alg = jwk.get("alg")
+        if alg not in ALLOWED_ALGORITHMS:
+            continue
+        if alg == "RS256" and jwk.get("kty") == "RSA":
+            numbers = rsa.RSAPublicNumbers(_b64url_to_int(jwk["e"]), _b64url_to_int(jwk["n"]))
+            keys[kid] = (numbers.public_key(), alg)
+        elif alg == "EdDSA" and jwk.get("kty") == "OKP" and jwk.get("crv") == "Ed25519":
+            keys[kid] = (ed25519.Ed25519PublicKey.from_public_bytes(_b64url_decode(jwk["x"])), alg)
+    return keys
+
+
+def _load_key_state() -> tuple[
+    Dict[str, Dict[str, Any]], Dict[str, Tuple[PublicKey, str]], tuple[bytes, str]
+]:
+    """Derive the KID index, public keys and served document from one JWKS read."""
 
     jwks = _load_jwks()
-    keys = jwks.get("keys", [])
-    return {k["kid"]: k for k in keys if "kid" in k}
+    jwks_by_kid = _index_by_kid(jwks)
+    return jwks_by_kid, _build_public_keys(jwks_by_kid), _render_jwks(jwks)
+
+
+# Loaded once per process; verification only needs a dict lookup.
+_JWKS_LOCK = threading.Lock()
+_JWKS_BY_KID: Dict[str, Dict[str, Any]]
+_PUBLIC_KEYS: Dict[str, Tuple[PublicKey, str]]
+_JWKS_DOCUMENT: tuple[bytes, str]
+_JWKS_BY_KID, _PUBLIC_KEYS, _JWKS_DOCUMENT = _load_key_state()
+
+_VERIFIED_TOKENS_LOCK = threading.Lock()
+_VERIFIED_TOKENS: TTLCache = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
 
+def reload_jwks() -> None:
+    """Re-read the JWKS from disk, e.g. after rotating the signing key."""
 
-def _get_public_key(kid: str) -> Dict[str, Any]:
-    """Resolve a public key from the JWKS by KID."""
+    global _JWKS_BY_KID, _PUBLIC_KEYS, _JWKS_DOCUMENT
+    with _JWKS_LOCK:
+        _JWKS_BY_KID, _PUBLIC_KEYS, _JWKS_DOCUMENT = _load_key_state()
+    with _VERIFIED_TOKENS_LOCK:
+        _VERIFIED_TOKENS.clear()
 
-    key = _jwks_by_kid().get(kid)
-    if not key:
+
+def get_jwks_document() -> tuple[bytes, str]:
+    """Return the serialized JWKS and its ETag as last loaded from disk."""
+
+    return _JWKS_DOCUMENT
+
+
+def _get_public_key(kid: str) -> Tuple[PublicKey, str]:
+    """Resolve the prebuilt public key and its algorithm for a KID."""
+
+    entry = _PUBLIC_KEYS.get(kid)
+    if entry is not None:
+        return entry
+    if kid not in _JWKS_BY_KID:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Unknown signing key",
         )
-    if key.get("alg") not in ALLOWED_ALGORITHMS:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Unsupported signing algorithm",
-        )
-    return key
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Unsupported signing algorithm",
+    )
 
 
-def decode_jwt(token: str) -> Dict[str, Any]:
-    """Decode and validate an RS256 JWT token."""
+def _verify_jwt(token: str) -> Dict[str, Any]:
+    """Verify the signature and claims of a locally issued JWT."""
 
     try:
         header = jwt.get_unverified_header(token)
-    except JWTError as exc:  # pragma: no cover - defensive branch
+    except jwt.InvalidTokenError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
 
     kid = header.get("kid")
     if not kid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing key id")
 
-    key = _get_public_key(kid)
+    key, algorithm = _get_public_key(kid)
 
     try:
         claims = jwt.decode(
             token,
             key,
-            algorithms=list(ALLOWED_ALGORITHMS),
+            algorithms=[algorithm],
             audience=AUDIENCE,
             issuer=ISSUER,
-            options={"verify_aud": True, "verify_iss": True, "verify_exp": True},
+            options=_DECODE_OPTIONS,
         )
-    except ExpiredSignatureError as exc:
+    except jwt.ExpiredSignatureError as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expired"
         ) from exc
-    except JWTClaimsError as exc:
+    except jwt.MissingRequiredClaimError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid claims"
+        ) from exc
+    except (jwt.InvalidAudienceError, jwt.InvalidIssuerError, jwt.ImmatureSignatureError) as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token claims"
         ) from exc
-    except JWTError as exc:  # pragma: no cover - defensive branch
+    except jwt.InvalidTokenError as exc:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)) from exc
 
-    for field in ("sub", "tenant_id", "role", "scope"):
-        if field not in claims or not claims[field]:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid claims")
+    if not all(claims.get(field) for field in REQUIRED_CLAIMS):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid claims")
+
+    # Parsed once here so cached claims carry ready-to-use UUIDs for handlers.
+    try:
+        claims["tenant_id_uuid"] = UUID(claims["tenant_id"])
+        claims["sub_uuid"] = UUID(claims["sub"])
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid claims"
+        ) from exc
+
+    return claims
+
+
+def decode_jwt(token: str) -> Dict[str, Any]:
+    """Decode and validate a JWT, reusing recent verifications."""
+
+    cache_key = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+    with _VERIFIED_TOKENS_LOCK:
+        claims = _VERIFIED_TOKENS.get(cache_key)
+    if claims is not None and claims["exp"] > time.time():
+        return claims
 
+    claims = _verify_jwt(token)
+    if "exp" in claims:
+        with _VERIFIED_TOKENS_LOCK:
+            _VERIFIED_TOKENS[cache_key] = claims
     return claims
 
 
 class Auth:
     """FastAPI dependency that authenticates incoming requests using JWT."""
 
-    def __call__(
+    async def __call__(
         self, credentials: HTTPAuthorizationCredentials = Depends(HTTP_BEARER)
     ) -> Dict[str, Any]:
         token = credentials.credentials
@@ -108,9 +228,9 @@ class Auth:
 def require_roles(*roles: str):
     """Dependency factory enforcing that the caller has one of the provided roles."""
 
-    expected = {role for role in roles}
+    expected = frozenset(roles)
 
-    def _dependency(claims: Dict[str, Any] = Depends(Auth())) -> Dict[str, Any]:
+    async def _dependency(claims: Dict[str, Any] = Depends(Auth())) -> Dict[str, Any]:
         role = claims.get("role")
         if expected and role not in expected:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
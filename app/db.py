@@ -3,9 +3,10 @@
 from __future__ import annotations
 
 import os
-from typing import Generator
+from typing import Any, AsyncIterator, Dict, Generator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 
@@ -19,10 +20,66 @@ def _build_default_postgres_url() -> str:
     return f"postgresql://{user}:{password}@{host}:{port}/{database}"
 
 
+# Each process holds both engines, so their pools add up: with the defaults a
+# worker opens at most (10 + 5) async + (5 + 5) sync = 25 connections. Keep
+# workers x that total under the server's max_connections (100 by default).
+_POOL_DEFAULTS = {"ASYNC": ("10", "5"), "SYNC": ("5", "5")}
+
+
+def _pool_options(kind: str) -> Dict[str, Any]:
+    """Pool and statement settings for the ``"SYNC"`` or ``"ASYNC"`` engine."""
+
+    pool_size, max_overflow = _POOL_DEFAULTS[kind]
+    return {
+        "pool_size": int(os.getenv(f"DB_{kind}_POOL_SIZE", pool_size)),
+        "max_overflow": int(os.getenv(f"DB_{kind}_MAX_OVERFLOW", max_overflow)),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "query_cache_size": 1200,
+        # Rows per multi-row INSERT ... VALUES when the ORM or an executemany
+        # batches inserts; PostgreSQL gains little beyond ~1000.
+        "insertmanyvalues_page_size": int(os.getenv("DB_INSERT_PAGE_SIZE", "1000")),
+    }
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """Pool and driver settings for the configured database."""
+
+    options = _pool_options("SYNC")
+    if make_url(url).get_driver_name() == "psycopg2":
+        options["executemany_mode"] = "values_plus_batch"
+        # TCP keepalives detect dead connections without the per-checkout
+        # SELECT 1 that pool_pre_ping would issue.
+        options["connect_args"] = {"keepalives": 1, "keepalives_idle": 30}
+    return options
+
+
 DATABASE_URL = os.getenv("DATABASE_URL", _build_default_postgres_url())
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+SessionLocal = sessionmaker(
+    bind=engine, autoflush=False, autocommit=False, expire_on_commit=False
+)
+
+
+def _build_async_url(url: str) -> str:
+    """Point a PostgreSQL URL at the asyncpg driver."""
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _build_async_url(DATABASE_URL))
+
+# asyncpg has no client-side TCP keepalive option, so stale connections (after
+# a failover or an idle timeout) are caught by a ping on checkout instead.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, pool_pre_ping=True, **_pool_options("ASYNC")
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
 
 
 class Base(DeclarativeBase):
@@ -40,3 +97,10 @@ def get_db() -> Generator:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of :func:`get_db` for coroutine handlers."""
+
+    async with AsyncSessionLocal() as db:
+        yield db
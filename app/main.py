@@ -2,24 +2,29 @@
 
 from __future__ import annotations
 
-import json
 import random
 from datetime import datetime
-from decimal import Decimal
 from typing import Any, Dict, Optional
 from uuid import UUID
 
-from fastapi import Depends, FastAPI, HTTPException, Query, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 
 from . import models, schemas
-from .auth import Auth, require_roles
-from .db import get_db
+from .auth import Auth, get_jwks_document, require_roles
+from .db import get_async_db
 from .routers.auth import router as auth_router
 
 
-app = FastAPI(title="AidDiag API (Local MVP)", version="1.0.0")
+app = FastAPI(
+    title="AidDiag API (Local MVP)",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,20 +36,39 @@ app.add_middleware(
 
 app.include_router(auth_router, prefix="/api/v1")
 
+INCLUDE_TOTAL_DESCRIPTION = (
+    "Incluye en `total` el número de registros del paciente, sin aplicar el "
+    "cursor (ejecuta un COUNT adicional)"
+)
+
 
 @app.get("/health")
-def health() -> Dict[str, str]:
+async def health() -> Dict[str, str]:
     """Simple health check endpoint."""
 
     return {"status": "ok"}
 
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Apply the weak If-None-Match comparison of RFC 9110 section 13.1.2."""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
 @app.get("/jwks.json")
-def jwks() -> Dict[str, Any]:
+async def jwks(if_none_match: Optional[str] = Header(default=None)) -> Response:
     """Serve the JWKS used to verify locally issued tokens."""
 
-    with open("app/static/jwks.json", "r", encoding="utf-8") as handler:
-        return json.load(handler)
+    body, etag = get_jwks_document()
+    headers = {"Cache-Control": "public, max-age=300", "ETag": etag}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
 
 
 @app.post(
@@ -52,14 +76,14 @@ def jwks() -> Dict[str, Any]:
     response_model=schemas.SymptomEntryCreated,
     status_code=status.HTTP_201_CREATED,
 )
-def create_symptoms(
+async def create_symptoms(
     body: schemas.SymptomEntryRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: Dict[str, Any] = Depends(Auth()),
 ) -> schemas.SymptomEntryCreated:
     """Persist a symptom entry for the authenticated tenant."""
 
-    tenant_id = UUID(claims["tenant_id"])
+    tenant_id = claims["tenant_id_uuid"]
     if body.tenant_id and body.tenant_id != tenant_id:
         raise HTTPException(status_code=400, detail="Tenant mismatch")
 
@@ -69,8 +93,7 @@ def create_symptoms(
         payload=body.payload,
     )
     db.add(symptom_entry)
-    db.commit()
-    db.refresh(symptom_entry)
+    await db.commit()
     return schemas.SymptomEntryCreated.model_validate(symptom_entry)
 
 
@@ -79,50 +102,50 @@ def create_symptoms(
     response_model=schemas.SymptomEntryList,
     status_code=status.HTTP_200_OK,
 )
-def list_symptom_entries(
+async def list_symptom_entries(
     patient_id: UUID,
     limit: int = Query(20, ge=1, le=100),
     cursor: Optional[datetime] = Query(
         None, description="Timestamp para paginacion por cursor (keyset)"
     ),
-    db: Session = Depends(get_db),
+    include_total: bool = Query(False, description=INCLUDE_TOTAL_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     claims: Dict[str, Any] = Depends(Auth()),
 ) -> schemas.SymptomEntryList:
     """Return paginated symptom entries for a patient using cursor pagination."""
 
-    tenant_id = UUID(claims["tenant_id"])
+    tenant_id = claims["tenant_id_uuid"]
 
-    query = (
-        db.query(models.SymptomEntry)
-        .filter(
-            models.SymptomEntry.tenant_id == tenant_id,
-            models.SymptomEntry.patient_id == patient_id,
-        )
+    query = select(models.SymptomEntry).where(
+        models.SymptomEntry.tenant_id == tenant_id,
+        models.SymptomEntry.patient_id == patient_id,
     )
 
-    if cursor:
-        query = query.filter(models.SymptomEntry.created_at < cursor)
+    # The total covers the patient's whole history, not only what follows the cursor.
+    total = (
+        await db.scalar(select(func.count()).select_from(query.subquery()))
+        if include_total
+        else None
+    )
 
-    query = query.order_by(models.SymptomEntry.created_at.desc())
+    if cursor:
+        query = query.where(models.SymptomEntry.created_at < cursor)
 
-    total = query.count()
-    items = query.limit(limit + 1).all()
+    # Row lists never traverse relationships; any future one must opt in with
+    # selectinload() instead of lazy-loading per row.
+    query = (
+        query.options(raiseload("*"))
+        .order_by(models.SymptomEntry.created_at.desc())
+        .limit(limit + 1)
+    )
+    items = (await db.scalars(query)).all()
 
     next_cursor = None
     if len(items) > limit:
         next_cursor = items[limit - 1].created_at
         items = items[:limit]
 
-    result = [
-        schemas.SymptomEntry(
-            id=item.id,
-            tenant_id=item.tenant_id,
-            patient_id=item.patient_id,
-            symptoms=item.payload,
-            created_at=item.created_at,
-        )
-        for item in items
-    ]
+    result = [schemas.SymptomEntry.model_validate(item) for item in items]
 
     return schemas.SymptomEntryList(total=total, items=result, next_cursor=next_cursor)
 
@@ -132,19 +155,19 @@ def list_symptom_entries(
     response_model=schemas.Prediction,
     status_code=status.HTTP_200_OK,
 )
-def predict(
+async def predict(
     body: schemas.PredictRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: Dict[str, Any] = Depends(Auth()),
 ) -> schemas.Prediction:
     """Generate a dummy prediction, persist it and audit the call."""
 
-    tenant_id = UUID(claims["tenant_id"])
+    tenant_id = claims["tenant_id_uuid"]
     if body.tenant_id and body.tenant_id != tenant_id:
         raise HTTPException(status_code=400, detail="Tenant mismatch")
 
     # Ensure the symptom entry belongs to the same tenant
-    symptom_entry = db.get(models.SymptomEntry, body.symptom_entry_id)
+    symptom_entry = await db.get(models.SymptomEntry, body.symptom_entry_id)
     if not symptom_entry or symptom_entry.tenant_id != tenant_id:
         raise HTTPException(status_code=404, detail="Symptom entry not found")
     if symptom_entry.patient_id != body.patient_id:
@@ -153,20 +176,22 @@ def predict(
     score = round(random.random(), 5)
     label = "POS" if score > 0.5 else "NEG"
 
+    # The id is assigned up front so the audit row can reference it and both
+    # rows are written in a single flush; uuidv7() stays the column default
+    # for other writers.
     prediction = models.Prediction(
+        id=models.uuid7(),
         tenant_id=tenant_id,
         patient_id=body.patient_id,
         symptom_entry_id=body.symptom_entry_id,
         model_version=body.model_version,
-        score=Decimal(str(score)),
+        score=score,
         label=label,
     )
-    db.add(prediction)
-    db.flush()
 
     audit_event = models.AuditEvent(
         tenant_id=tenant_id,
-        actor_sub=UUID(claims["sub"]),
+        actor_sub=claims["sub_uuid"],
         action="predict",
         entity="prediction",
         entity_id=str(prediction.id),
@@ -176,20 +201,10 @@ def predict(
             "label": label,
         },
     )
-    db.add(audit_event)
-    db.commit()
-    db.refresh(prediction)
-
-    return schemas.Prediction(
-        id=prediction.id,
-        tenant_id=prediction.tenant_id,
-        patient_id=prediction.patient_id,
-        symptom_entry_id=prediction.symptom_entry_id,
-        model_version=prediction.model_version,
-        score=float(prediction.score),
-        label=prediction.label,
-        created_at=prediction.created_at,
-    )
+    db.add_all([prediction, audit_event])
+    await db.commit()
+
+    return schemas.Prediction.model_validate(prediction)
 
 
 @app.get(
@@ -197,65 +212,85 @@ def predict(
     response_model=schemas.PredictionList,
     status_code=status.HTTP_200_OK,
 )
-def list_predictions(
+async def list_predictions(
     patient_id: UUID,
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    cursor: Optional[datetime] = Query(
+        None, description="Timestamp para paginacion por cursor (keyset)"
+    ),
+    cursor_id: Optional[UUID] = Query(
+        None, description="Id de la ultima prediccion recibida (desempate del cursor)"
+    ),
+    include_total: bool = Query(False, description=INCLUDE_TOTAL_DESCRIPTION),
+    db: AsyncSession = Depends(get_async_db),
     claims: Dict[str, Any] = Depends(Auth()),
 ) -> schemas.PredictionList:
-    """Return the prediction history for a patient within the tenant."""
+    """Return the prediction history for a patient using keyset pagination."""
 
-    tenant_id = UUID(claims["tenant_id"])
-    query = (
-        db.query(models.Prediction)
-        .filter(
-            models.Prediction.tenant_id == tenant_id,
-            models.Prediction.patient_id == patient_id,
-        )
-        .order_by(models.Prediction.created_at.desc())
+    tenant_id = claims["tenant_id_uuid"]
+    query = select(models.Prediction).where(
+        models.Prediction.tenant_id == tenant_id,
+        models.Prediction.patient_id == patient_id,
+    )
+    # The total covers the patient's whole history, not only what follows the cursor.
+    total = (
+        await db.scalar(select(func.count()).select_from(query.subquery()))
+        if include_total
+        else None
     )
-    total = query.count()
-    items = query.limit(limit).offset(offset).all()
-    result = [
-        schemas.Prediction(
-            id=item.id,
-            tenant_id=item.tenant_id,
-            patient_id=item.patient_id,
-            symptom_entry_id=item.symptom_entry_id,
-            model_version=item.model_version,
-            score=float(item.score),
-            label=item.label,
-            created_at=item.created_at,
+
+    if cursor and cursor_id:
+        query = query.where(
+            tuple_(models.Prediction.created_at, models.Prediction.id)
+            < tuple_(cursor, cursor_id)
         )
-        for item in items
-    ]
-    return schemas.PredictionList(total=total, items=result)
+    elif cursor:
+        query = query.where(models.Prediction.created_at < cursor)
+
+    query = (
+        query.options(raiseload("*"))
+        .order_by(models.Prediction.created_at.desc(), models.Prediction.id.desc())
+        .limit(limit + 1)
+    )
+    items = (await db.scalars(query)).all()
+
+    next_cursor = None
+    next_cursor_id = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1].created_at
+        next_cursor_id = items[-1].id
+
+    result = [schemas.Prediction.model_validate(item) for item in items]
+    return schemas.PredictionList(
+        total=total, items=result, next_cursor=next_cursor, next_cursor_id=next_cursor_id
+    )
 
 
 @app.get(
     "/api/v1/cases",
     response_model=schemas.CaseList,
 )
-def list_cases(
+async def list_cases(
     assigned_to: UUID,
     status_filter: str = Query("open"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: Dict[str, Any] = Depends(require_roles("Profesional", "Admin")),
 ) -> schemas.CaseList:
     """List cases assigned to a professional within the tenant."""
 
-    tenant_id = UUID(claims["tenant_id"])
+    tenant_id = claims["tenant_id_uuid"]
     query = (
-        db.query(models.Case)
-        .filter(
+        select(models.Case)
+        .where(
             models.Case.tenant_id == tenant_id,
             models.Case.assigned_to == assigned_to,
             models.Case.status == status_filter,
         )
+        .options(raiseload("*"))
         .order_by(models.Case.updated_at.desc())
     )
-    items = query.all()
+    items = (await db.scalars(query)).all()
     return schemas.CaseList(total=len(items), items=[schemas.Case.model_validate(item) for item in items])
 
 
@@ -263,23 +298,21 @@ def list_cases(
     "/api/v1/cases/{case_id}",
     response_model=schemas.Case,
 )
-def patch_case(
+async def patch_case(
     case_id: UUID,
     body: schemas.CasePatch,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: Dict[str, Any] = Depends(require_roles("Profesional", "Admin")),
 ) -> schemas.Case:
     """Update the status of a case belonging to the tenant."""
 
-    tenant_id = UUID(claims["tenant_id"])
-    case = db.get(models.Case, case_id)
+    tenant_id = claims["tenant_id_uuid"]
+    case = await db.get(models.Case, case_id)
     if not case or case.tenant_id != tenant_id:
         raise HTTPException(status_code=404, detail="Case not found")
 
     case.status = body.status
-    db.add(case)
-    db.commit()
-    db.refresh(case)
+    await db.commit()
     return schemas.Case.model_validate(case)
 
 
@@ -288,27 +321,26 @@ def patch_case(
     response_model=schemas.AuditEventCreated,
     status_code=status.HTTP_201_CREATED,
 )
-def audit_event(
+async def audit_event(
     body: schemas.AuditEventCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     claims: Dict[str, Any] = Depends(Auth()),
 ) -> schemas.AuditEventCreated:
     """Persist an audit event for the tenant."""
 
-    tenant_id = UUID(claims["tenant_id"])
+    tenant_id = claims["tenant_id_uuid"]
     if body.tenant_id and body.tenant_id != tenant_id:
         raise HTTPException(status_code=400, detail="Tenant mismatch")
 
     event = models.AuditEvent(
         tenant_id=tenant_id,
-        actor_sub=UUID(claims["sub"]),
+        actor_sub=claims["sub_uuid"],
         action=body.action,
         entity=body.entity,
         entity_id=body.entity_id,
         meta=body.meta,
     )
     db.add(event)
-    db.commit()
-    db.refresh(event)
+    await db.commit()
     return schemas.AuditEventCreated(id=event.id, ts=event.ts)
 
@@ -3,7 +3,8 @@
 from __future__ import annotations
 
 from datetime import datetime
-from decimal import Decimal
+import os
+import time
 import uuid
 
 from sqlalchemy import (
@@ -12,26 +13,41 @@ from sqlalchemy import (
     ForeignKey,
     Index,
     Integer,
-    JSON,
     Numeric,
     String,
     Text,
     TIMESTAMP,
-    UniqueConstraint,
     func,
+    text,
 )
-from sqlalchemy.dialects.postgresql import CITEXT, UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .db import Base
 
 
+def uuid7() -> uuid.UUID:
+    """Build a time-ordered UUIDv7 client-side, matching the ``uuidv7()`` SQL default.
+
+    Lets a handler know a row's id before the INSERT, so related rows can be
+    written in the same flush instead of waiting for RETURNING.
+    """
+
+    unix_ms = time.time_ns() // 1_000_000
+    value = ((unix_ms & 0xFFFF_FFFF_FFFF) << 80) | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 9562 variant
+    return uuid.UUID(int=value)
+
+
 class Tenant(Base):
     """Represents a logical tenant for multi-tenant isolation."""
 
     __tablename__ = "tenants"
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, server_default=text("uuidv7()")
+    )
     name: Mapped[str] = mapped_column(Text, nullable=False, unique=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
 
@@ -63,20 +79,23 @@ class User(Base):
     """User accounts authenticated via Cognito/local mock."""
 
     __tablename__ = "users"
+    __mapper_args__ = {"eager_defaults": True}
     __table_args__ = (
-        UniqueConstraint("tenant_id", "email", name="uq_users_tenant_email"),
+        Index("uq_users_tenant_email_ci", "tenant_id", text("lower(email)"), unique=True),
         Index("ix_users_tenant_created_at", "tenant_id", "created_at"),
     )
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, server_default=text("uuidv7()")
+    )
     tenant_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
     )
-    email: Mapped[str] = mapped_column(CITEXT(), nullable=False)
+    email: Mapped[str] = mapped_column(Text, nullable=False)
     hashed_password: Mapped[str] = mapped_column(Text, nullable=False)
-    mfa_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
+    mfa_enabled: Mapped[bool] = mapped_column(Boolean, server_default=text("false"))
     mfa_secret: Mapped[str | None] = mapped_column(Text)
-    status: Mapped[str] = mapped_column(String(20), default="active")
+    status: Mapped[str] = mapped_column(String(20), server_default="active")
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
 
     tenant: Mapped[Tenant] = relationship("Tenant", back_populates="users")
@@ -105,13 +124,30 @@ class SymptomEntry(Base):
     """Captured symptom entries submitted by patients."""
 
     __tablename__ = "symptom_entries"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index(
+            "ix_symptom_entries_tenant_patient_created",
+            "tenant_id",
+            "patient_id",
+            text("created_at DESC"),
+        ),
+        Index(
+            "ix_symptom_entries_payload_gin",
+            "payload",
+            postgresql_using="gin",
+            postgresql_ops={"payload": "jsonb_path_ops"},
+        ),
+    )
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, server_default=text("uuidv7()")
+    )
     tenant_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
     )
     patient_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
-    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
 
     tenant: Mapped[Tenant] = relationship("Tenant", back_populates="symptom_entries")
@@ -121,8 +157,21 @@ class Prediction(Base):
     """Model predictions derived from symptom entries."""
 
     __tablename__ = "predictions"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index(
+            "ix_predictions_tenant_patient_ts",
+            "tenant_id",
+            "patient_id",
+            text("created_at DESC"),
+            text("id DESC"),
+            postgresql_include=["symptom_entry_id", "model_version", "score", "label"],
+        ),
+    )
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, server_default=text("uuidv7()")
+    )
     tenant_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
     )
@@ -131,7 +180,7 @@ class Prediction(Base):
         UUID(as_uuid=True), ForeignKey("symptom_entries.id", ondelete="CASCADE"), nullable=False
     )
     model_version: Mapped[str] = mapped_column(String, nullable=False)
-    score: Mapped[Decimal] = mapped_column(Numeric(6, 5), nullable=False)
+    score: Mapped[float] = mapped_column(Numeric(6, 5, asdecimal=False), nullable=False)
     label: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
 
@@ -142,14 +191,26 @@ class Case(Base):
     """Care cases assigned to health professionals."""
 
     __tablename__ = "cases"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index(
+            "ix_cases_assigned_open",
+            "tenant_id",
+            "assigned_to",
+            text("updated_at DESC"),
+            postgresql_where=text("status = 'open'"),
+        ),
+    )
 
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, server_default=text("uuidv7()")
+    )
     tenant_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("tenants.id", ondelete="CASCADE"), nullable=False
     )
     patient_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     assigned_to: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
-    status: Mapped[str] = mapped_column(String(20), nullable=False, default="open")
+    status: Mapped[str] = mapped_column(String(20), nullable=False, server_default="open")
     updated_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now()
     )
@@ -162,6 +223,18 @@ class AuditEvent(Base):
     """Audit log for tracking prediction usage and other events."""
 
     __tablename__ = "audit_events"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index(
+            "ix_audit_events_meta_gin",
+            "meta",
+            postgresql_using="gin",
+            postgresql_ops={"meta": "jsonb_path_ops"},
+        ),
+        # Monthly partitions are created by create_audit_events_partition();
+        # filter on ts so the planner can prune them.
+        {"postgresql_partition_by": "RANGE (ts)"},
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     tenant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
@@ -169,5 +242,7 @@ class AuditEvent(Base):
     action: Mapped[str] = mapped_column(Text, nullable=False)
     entity: Mapped[str] = mapped_column(Text, nullable=False)
     entity_id: Mapped[str | None] = mapped_column(Text)
-    ts: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
-    meta: Mapped[dict | None] = mapped_column(JSON)
+    ts: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), primary_key=True, server_default=func.now()
+    )
+    meta: Mapped[dict | None] = mapped_column(JSONB)
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
+from functools import lru_cache
 import os
 import secrets
-from typing import Any, Dict
-from uuid import UUID
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple, Union
 
 import hashlib
 import hmac
@@ -15,9 +17,16 @@ try:  # pragma: no cover - optional dependency
     import bcrypt  # type: ignore
 except ImportError:  # pragma: no cover - fallback for environments without bcrypt
     bcrypt = None
+import jwt
+from cachetools import TTLCache
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
 from fastapi import APIRouter, Depends, HTTPException, status
-from jose import jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 
 from .. import models, schemas
 from ..auth import AUDIENCE, ISSUER, Auth, decode_jwt, require_roles
@@ -27,33 +36,80 @@ from ..db import get_db
 router = APIRouter(tags=["Auth"])
 
 PRIVATE_KEY_PATH = os.getenv("JWT_PRIVATE_KEY_PATH", "app/static/private.pem")
-DEFAULT_KID = os.getenv("JWT_LOCAL_KID", "local-rs256")
+# Defaults to local-rs256 / local-eddsa depending on the key type.
+DEFAULT_KID = os.getenv("JWT_LOCAL_KID")
 DEFAULT_TENANT_NAME = os.getenv("DEFAULT_TENANT_NAME", "demo")
+TOKEN_TTL_SECONDS = 3600
 
+# Claims shared by every locally issued token; copied and completed per call.
+_CLAIMS_TEMPLATE: Dict[str, Any] = {
+    "iss": ISSUER,
+    "aud": AUDIENCE,
+    "scope": "api.read api.write",
+}
+
+# Handlers that serialize a user or inspect its roles fetch them in the same
+# round-trip as the user instead of lazily on first access.
+_WITH_ROLES = (joinedload(models.User.roles),)
+
+# Roles are seeded by the migrations and effectively static; cache their column
+# values (not ORM instances, which belong to a session) to skip the lookup.
+_ROLE_CACHE_LOCK = threading.Lock()
+_ROLE_CACHE: TTLCache = TTLCache(maxsize=32, ttl=300)
+
+
+@lru_cache(maxsize=1)
+def _get_signing_key() -> Tuple[Union[RSAPrivateKey, Ed25519PrivateKey], str, str]:
+    """Load and parse the signing key once; return it with its JWS alg and kid.
+
+    RSA keys sign RS256 and Ed25519 keys sign EdDSA, so switching algorithms
+    only requires pointing ``JWT_PRIVATE_KEY_PATH`` at a different key.
+    """
 
-def _get_private_key() -> bytes:
     if not os.path.exists(PRIVATE_KEY_PATH):
         raise RuntimeError(
             "Private key not found. Generate it with scripts/make_jwt.py first."
         )
     with open(PRIVATE_KEY_PATH, "rb") as handler:
-        return handler.read()
+        key = load_pem_private_key(handler.read(), password=None)
+    algorithm = "EdDSA" if isinstance(key, Ed25519PrivateKey) else "RS256"
+    return key, algorithm, DEFAULT_KID or f"local-{algorithm.lower()}"
+
 
+# Used when bcrypt is unavailable. Legacy unsalted ``sha256$`` hashes are still
+# accepted so accounts seeded before the switch keep working.
+_SCRYPT_PREFIX = "scrypt$"
+_SCRYPT_PARAMS = {"n": 2**14, "r": 8, "p": 1}
+_LEGACY_SHA256_PREFIX = "sha256$"
+# Cost for every password stored through the API; deliberately not tunable
+# from the environment so a demo setting can never weaken real accounts.
+_BCRYPT_ROUNDS = 12
 
-_FALLBACK_PREFIX = "sha256$"
 
+def _scrypt_hex(password: str, salt: bytes) -> str:
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, **_SCRYPT_PARAMS).hex()
+
+
+def _hash_password(password: str, salt: Optional[bytes] = None) -> str:
+    """Hash ``password``; ``salt`` is a ``bcrypt.gensalt()`` value, or raw scrypt salt bytes."""
 
-def _hash_password(password: str) -> str:
     if bcrypt is None:
-        digest = hashlib.sha256(password.encode("utf-8")).hexdigest()
-        return f"{_FALLBACK_PREFIX}{digest}"
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+        salt = salt or os.urandom(16)
+        return f"{_SCRYPT_PREFIX}{salt.hex()}${_scrypt_hex(password, salt)}"
+    return bcrypt.hashpw(password.encode("utf-8"), salt or bcrypt.gensalt(rounds=_BCRYPT_ROUNDS)).decode("utf-8")
 
 
 def _verify_password(password: str, hashed: str) -> bool:
-    if hashed.startswith(_FALLBACK_PREFIX):
+    if hashed.startswith(_SCRYPT_PREFIX):
+        try:
+            salt_hex, digest = hashed[len(_SCRYPT_PREFIX) :].split("$", 1)
+            salt = bytes.fromhex(salt_hex)
+        except ValueError:
+            return False
+        return hmac.compare_digest(digest, _scrypt_hex(password, salt))
+    if hashed.startswith(_LEGACY_SHA256_PREFIX):
         candidate = hashlib.sha256(password.encode("utf-8")).hexdigest()
-        return hmac.compare_digest(hashed[len(_FALLBACK_PREFIX) :], candidate)
+        return hmac.compare_digest(hashed[len(_LEGACY_SHA256_PREFIX) :], candidate)
     if bcrypt is None:
         raise HTTPException(status_code=500, detail="bcrypt dependency missing")
     try:
@@ -62,24 +118,65 @@ def _verify_password(password: str, hashed: str) -> bool:
         return False
 
 
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    """Hash verified against when the email is unknown, built on first use.
+
+    It uses the API's own cost so a failed sign-in for an unknown email takes
+    as long as one for an account registered through the API.
+    """
+
+    return _hash_password(secrets.token_urlsafe(16))
+
+
 def _get_or_create_demo_tenant(db: Session) -> models.Tenant:
-    tenant = db.query(models.Tenant).filter(models.Tenant.name == DEFAULT_TENANT_NAME).first()
+    tenant = db.execute(
+        select(models.Tenant).where(models.Tenant.name == DEFAULT_TENANT_NAME)
+    ).scalar_one_or_none()
     if tenant:
         return tenant
-    tenant = models.Tenant(name=DEFAULT_TENANT_NAME)
-    db.add(tenant)
+    # First use only: the no-op update makes RETURNING yield the row even if a
+    # concurrent request created the tenant in between.
+    stmt = pg_insert(models.Tenant).values(name=DEFAULT_TENANT_NAME)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.Tenant.name], set_={"name": stmt.excluded.name}
+    ).returning(models.Tenant)
+    tenant = db.execute(stmt).scalar_one()
     db.commit()
-    db.refresh(tenant)
     return tenant
 
 
 def _get_role(db: Session, role_name: str) -> models.Role:
-    role = db.query(models.Role).filter(models.Role.name == role_name).first()
+    with _ROLE_CACHE_LOCK:
+        cached: Optional[Tuple[int, str, Optional[str]]] = _ROLE_CACHE.get(role_name)
+    if cached is not None:
+        role_id, name, description = cached
+        role = models.Role(id=role_id, name=name, description=description)
+        # Attach as an already-persistent row: merge(load=False) emits no SELECT
+        # and returns the session's own instance if the role is already loaded.
+        make_transient_to_detached(role)
+        return db.merge(role, load=False)
+
+    role = db.execute(select(models.Role).where(models.Role.name == role_name)).scalar_one_or_none()
     if not role:
         raise HTTPException(status_code=404, detail="Role not found")
+    with _ROLE_CACHE_LOCK:
+        _ROLE_CACHE[role_name] = (role.id, role.name, role.description)
     return role
 
 
+def _link_role(db: Session, user: models.User, role: models.Role) -> None:
+    # Appending to user.roles would first SELECT an unloaded collection; write
+    # the association row directly and record it as already-committed state.
+    db.execute(
+        pg_insert(models.UserRole)
+        .values(user_id=user.id, role_id=role.id)
+        .on_conflict_do_nothing()
+    )
+    current = user.__dict__.get("roles", [])
+    set_committed_value(user, "roles", [*current, role])
+
+
 def _user_to_schema(user: models.User) -> schemas.UserOut:
     # ensure roles are loaded
     _ = [role.name for role in user.roles]
@@ -87,21 +184,21 @@ def _user_to_schema(user: models.User) -> schemas.UserOut:
 
 
 def _issue_local_token(user: models.User, role_name: str) -> schemas.AuthToken:
-    private_key = _get_private_key()
-    now = datetime.now(timezone.utc)
-    expires = now + timedelta(hours=1)
-    claims = {
-        "iss": ISSUER,
-        "aud": AUDIENCE,
-        "iat": int(now.timestamp()),
-        "exp": int(expires.timestamp()),
-        "sub": str(user.id),
-        "tenant_id": str(user.tenant_id),
-        "role": role_name,
-        "scope": "api.read api.write",
-    }
-    token = jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": DEFAULT_KID})
-    return schemas.AuthToken(token=token, expires_at=expires)
+    private_key, algorithm, kid = _get_signing_key()
+    now_ts = int(time.time())
+    exp_ts = now_ts + TOKEN_TTL_SECONDS
+    claims = _CLAIMS_TEMPLATE.copy()
+    claims.update(
+        iat=now_ts,
+        exp=exp_ts,
+        sub=str(user.id),
+        tenant_id=str(user.tenant_id),
+        role=role_name,
+    )
+    token = jwt.encode(claims, private_key, algorithm=algorithm, headers={"kid": kid})
+    return schemas.AuthToken(
+        token=token, expires_at=datetime.fromtimestamp(exp_ts, tz=timezone.utc)
+    )
 
 
 @router.post("/auth/signup", response_model=schemas.UserOut, status_code=status.HTTP_201_CREATED)
@@ -111,23 +208,25 @@ def signup(payload: schemas.SignUpRequest, db: Session = Depends(get_db)) -> sch
     tenant = _get_or_create_demo_tenant(db)
     role = _get_role(db, payload.role)
 
-    existing = (
-        db.query(models.User)
-        .filter(models.User.tenant_id == tenant.id, models.User.email == payload.email)
-        .first()
-    )
-    if existing:
+    # The unique (tenant_id, lower(email)) index arbitrates duplicates, so the
+    # existence check and the insert are one atomic statement.
+    user = db.execute(
+        pg_insert(models.User)
+        .values(
+            tenant_id=tenant.id,
+            email=payload.email,
+            hashed_password=_hash_password(payload.password),
+        )
+        .on_conflict_do_nothing(
+            index_elements=[models.User.tenant_id, func.lower(models.User.email)]
+        )
+        .returning(models.User)
+    ).scalar_one_or_none()
+    if user is None:
         raise HTTPException(status_code=409, detail="User already exists")
 
-    user = models.User(
-        tenant_id=tenant.id,
-        email=payload.email,
-        hashed_password=_hash_password(payload.password),
-    )
-    user.roles.append(role)
-    db.add(user)
+    _link_role(db, user, role)
     db.commit()
-    db.refresh(user)
     return _user_to_schema(user)
 
 
@@ -141,11 +240,21 @@ def signin(
     if isinstance(payload, schemas.SignInPasswordRequest):
         tenant = _get_or_create_demo_tenant(db)
         user = (
-            db.query(models.User)
-            .filter(models.User.tenant_id == tenant.id, models.User.email == payload.email)
-            .first()
+            db.execute(
+                select(models.User)
+                .options(*_WITH_ROLES)
+                .where(
+                    models.User.tenant_id == tenant.id,
+                    func.lower(models.User.email) == payload.email.lower(),
+                )
+            )
+            .unique()
+            .scalar_one_or_none()
         )
-        if not user or not _verify_password(payload.password, user.hashed_password):
+        if user is None:
+            _verify_password(payload.password, _dummy_hash())
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        if not _verify_password(payload.password, user.hashed_password):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         role_name = user.roles[0].name if user.roles else "Paciente"
         return _issue_local_token(user, role_name)
@@ -165,8 +274,8 @@ def refresh_token(
 
     try:
         claims = decode_jwt(payload.refresh_token)
-        user_id = UUID(claims["sub"])
-        tenant_id = UUID(claims["tenant_id"])
+        user_id = claims["sub_uuid"]
+        tenant_id = claims["tenant_id_uuid"]
         role_name = claims["role"]
 
         user = db.get(models.User, user_id)
@@ -188,17 +297,15 @@ def assign_role(
 ) -> schemas.UserOut:
     """Assign an existing role to a user (admin-only)."""
 
-    tenant_id = UUID(claims["tenant_id"])
-    user = db.get(models.User, payload.user_id)
+    tenant_id = claims["tenant_id_uuid"]
+    user = db.get(models.User, payload.user_id, options=_WITH_ROLES)
     if not user or user.tenant_id != tenant_id:
         raise HTTPException(status_code=404, detail="User not found")
 
     role = _get_role(db, payload.role)
     if role not in user.roles:
-        user.roles.append(role)
-    db.add(user)
+        _link_role(db, user, role)
     db.commit()
-    db.refresh(user)
     return _user_to_schema(user)
 
 
@@ -210,22 +317,20 @@ def enable_mfa(
 ) -> schemas.UserOut:
     """Simulate enabling MFA by storing a generated secret."""
 
-    tenant_id = UUID(claims["tenant_id"])
-    actor_id = UUID(claims["sub"])
+    tenant_id = claims["tenant_id_uuid"]
+    actor_id = claims["sub_uuid"]
     target_id = payload.user_id or actor_id
 
     if payload.user_id and payload.user_id != actor_id and claims.get("role") != "Admin":
         raise HTTPException(status_code=403, detail="Not allowed")
 
-    user = db.get(models.User, target_id)
+    user = db.get(models.User, target_id, options=_WITH_ROLES)
     if not user or user.tenant_id != tenant_id:
         raise HTTPException(status_code=404, detail="User not found")
 
     user.mfa_enabled = True
     user.mfa_secret = secrets.token_hex(16)
-    db.add(user)
     db.commit()
-    db.refresh(user)
     return _user_to_schema(user)
 
 
@@ -237,22 +342,27 @@ def password_reset(
 ) -> schemas.UserOut:
     """Simulated password reset that updates the hashed password."""
 
-    tenant_id = UUID(claims["tenant_id"])
+    tenant_id = claims["tenant_id_uuid"]
     user = (
-        db.query(models.User)
-        .filter(models.User.tenant_id == tenant_id, models.User.email == payload.email)
-        .first()
+        db.execute(
+            select(models.User)
+            .options(*_WITH_ROLES)
+            .where(
+                models.User.tenant_id == tenant_id,
+                func.lower(models.User.email) == payload.email.lower(),
+            )
+        )
+        .unique()
+        .scalar_one_or_none()
     )
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    if user.id != UUID(claims["sub"]) and claims.get("role") != "Admin":
+    if user.id != claims["sub_uuid"] and claims.get("role") != "Admin":
         raise HTTPException(status_code=403, detail="Not allowed")
 
     user.hashed_password = _hash_password(payload.new_password)
-    db.add(user)
     db.commit()
-    db.refresh(user)
     return _user_to_schema(user)
 
 
@@ -263,8 +373,8 @@ def me(
 ) -> schemas.MeOut:
     """Return the authenticated user's profile along with scopes."""
 
-    user_id = UUID(claims["sub"])
-    user = db.get(models.User, user_id)
+    user_id = claims["sub_uuid"]
+    user = db.get(models.User, user_id, options=_WITH_ROLES)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -3,10 +3,15 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Annotated, Any, Dict, List, Optional
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import AliasChoices, BaseModel, Field, StringConstraints
+
+
+# Shared constrained types so every request model reuses one compiled validator.
+EmailField = Annotated[str, StringConstraints(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")]
+PasswordField = Annotated[str, StringConstraints(min_length=8)]
 
 
 class BaseModelConfig(BaseModel):
@@ -32,10 +37,8 @@ class UserOut(BaseModelConfig):
 
 
 class SignUpRequest(BaseModel):
-    email: str = Field(
-        ..., description="Email del usuario a registrar", pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
-    )
-    password: str = Field(..., min_length=8, description="Contraseña para el login local")
+    email: EmailField = Field(..., description="Email del usuario a registrar")
+    password: PasswordField = Field(..., description="Contraseña para el login local")
     role: str = Field(
         default="Paciente",
         description="Rol inicial asignado al usuario (Paciente por defecto)",
@@ -43,7 +46,7 @@ class SignUpRequest(BaseModel):
 
 
 class SignInPasswordRequest(BaseModel):
-    email: str = Field(..., pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+    email: EmailField
     password: str
 
 
@@ -68,8 +71,8 @@ class EnableMFARequest(BaseModel):
 
 
 class PasswordResetRequest(BaseModel):
-    email: str = Field(..., pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
-    new_password: str = Field(..., min_length=8)
+    email: EmailField
+    new_password: PasswordField
 
 
 class AuthToken(BaseModel):
@@ -92,7 +95,7 @@ class SymptomEntryRequest(BaseModel):
     payload: dict
 
 
-class SymptomEntryCreated(BaseModel):
+class SymptomEntryCreated(BaseModelConfig):
     id: UUID
     created_at: datetime
 
@@ -109,7 +112,7 @@ class PredictRequest(BaseModel):
     model_config = {"protected_namespaces": ()}
 
 
-class Prediction(BaseModel):
+class Prediction(BaseModelConfig):
     id: UUID
     tenant_id: UUID
     patient_id: UUID
@@ -119,19 +122,22 @@ class Prediction(BaseModel):
     label: str
     created_at: datetime
 
-    model_config = {"protected_namespaces": ()}
-
 
 class PredictionList(BaseModel):
-    total: int
+    total: Optional[int] = Field(
+        default=None,
+        description="Registros del paciente sin aplicar el cursor (solo con include_total=true)",
+    )
     items: List[Prediction]
+    next_cursor: Optional[datetime] = None
+    next_cursor_id: Optional[UUID] = None
 
 
 class CasePatch(BaseModel):
     status: str = Field(pattern="^(open|in_progress|closed)$")
 
 
-class Case(BaseModel):
+class Case(BaseModelConfig):
     id: UUID
     tenant_id: UUID
     patient_id: UUID
@@ -166,12 +172,15 @@ class SymptomEntry(BaseModelConfig):
     id: UUID
     tenant_id: UUID
     patient_id: UUID
-    symptoms: Dict[str, Any]
+    symptoms: Dict[str, Any] = Field(validation_alias=AliasChoices("symptoms", "payload"))
     created_at: datetime
 
 
 class SymptomEntryList(BaseModel):
-    total: int
+    total: Optional[int] = Field(
+        default=None,
+        description="Registros del paciente sin aplicar el cursor (solo con include_total=true)",
+    )
     items: List[SymptomEntry]
     next_cursor: Optional[datetime] = None
 
@@ -0,0 +1 @@
+"""Operational scripts for the AidDiag MVP (run with ``python -m scripts.<name>``)."""
@@ -1,26 +1,43 @@
 # scripts/make_jwt.py
-import json, os, uuid
+import base64, json, os, uuid
 from datetime import datetime, timedelta, timezone
-from jose import jwt
-from cryptography.hazmat.primitives.asymmetric import rsa
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
-from jose.utils import base64url_encode
 
 ISSUER = os.getenv("JWT_ISSUER", "http://localhost:8000")
 AUDIENCE = os.getenv("JWT_AUDIENCE", "aiddiag-api")
 PRIV_PATH = os.getenv("JWT_PRIVATE_KEY_PATH", "app/static/private.pem")
 JWKS_PATH = os.getenv("JWT_PUBLIC_JWKS_PATH", "app/static/jwks.json")
 
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def int_to_b64url(value: int) -> str:
+    return b64url(value.to_bytes((value.bit_length() + 7) // 8, "big"))
+
+
+# Solo aplica al generar una clave nueva: "RS256" (RSA 2048) o "EdDSA" (Ed25519,
+# firma y verificación mucho más rápidas). Con una clave existente manda su tipo.
+ALG = os.getenv("JWT_ALG", "RS256")
+
 # 1) Generar/leer par de claves
 os.makedirs(os.path.dirname(PRIV_PATH), exist_ok=True)
 if not os.path.exists(PRIV_PATH):
-    key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+    if ALG == "EdDSA":
+        key = ed25519.Ed25519PrivateKey.generate()
+        private_format = serialization.PrivateFormat.PKCS8
+    else:
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048, backend=default_backend())
+        private_format = serialization.PrivateFormat.TraditionalOpenSSL  # o PKCS8
     with open(PRIV_PATH, "wb") as f:
         f.write(
             key.private_bytes(
                 encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.TraditionalOpenSSL,  # o PKCS8
+                format=private_format,
                 encryption_algorithm=serialization.NoEncryption(),
             )
         )
@@ -29,17 +46,30 @@ else:
         key = serialization.load_pem_private_key(f.read(), password=None, backend=default_backend())
 
 pub = key.public_key()
+ALG = "EdDSA" if isinstance(key, ed25519.Ed25519PrivateKey) else "RS256"
+KID = os.getenv("JWT_KID", f"local-{ALG.lower()}")
 
-# 2) Construir JWKS (n, e) y guardarlo
-numbers = pub.public_numbers()
-n_b64 = base64url_encode(numbers.n.to_bytes((numbers.n.bit_length() + 7)//8, "big")).decode()
-e_b64 = base64url_encode(numbers.e.to_bytes((numbers.e.bit_length() + 7)//8, "big")).decode()
+# 2) Construir la JWK pública y guardarla en el JWKS
+if ALG == "EdDSA":
+    raw = pub.public_bytes(encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw)
+    jwk = {"kty": "OKP", "crv": "Ed25519", "use": "sig", "alg": ALG, "kid": KID, "x": b64url(raw)}
+else:
+    numbers = pub.public_numbers()
+    jwk = {"kty": "RSA", "use": "sig", "alg": ALG, "kid": KID, "n": int_to_b64url(numbers.n), "e": int_to_b64url(numbers.e)}
 
-KID = os.getenv("JWT_KID", "local-rs256")
-jwks = {"keys": [{"kty": "RSA", "use": "sig", "alg": "RS256", "kid": KID, "n": n_b64, "e": e_b64}]}
-os.makedirs(os.path.dirname(JWKS_PATH), exist_ok=True)
-with open(JWKS_PATH, "w") as f:
-    json.dump(jwks, f)
+# Se conservan las claves con otro kid para que, durante una rotación (p. ej.
+# RS256 -> EdDSA), los tokens firmados con la clave anterior sigan validando.
+# Si el JWKS ya publica esta misma clave no se reescribe, para no invalidar el
+# ETag ni las cachés de quien lo consume.
+current = []
+if os.path.exists(JWKS_PATH):
+    with open(JWKS_PATH) as f:
+        current = json.load(f).get("keys", [])
+if jwk not in current:
+    jwks = {"keys": [*(k for k in current if k.get("kid") != KID), jwk]}
+    os.makedirs(os.path.dirname(JWKS_PATH), exist_ok=True)
+    with open(JWKS_PATH, "w") as f:
+        json.dump(jwks, f)
 
 # 3) Claims del token
 now = datetime.now(timezone.utc)
@@ -54,14 +84,7 @@ claims = {
     "scope": "api.read api.write",
 }
 
-# 4) **IMPORTANTE**: serializar la clave privada a PEM (bytes) para python-jose
-private_pem = key.private_bytes(
-    encoding=serialization.Encoding.PEM,
-    format=serialization.PrivateFormat.TraditionalOpenSSL,  # o PKCS8
-    encryption_algorithm=serialization.NoEncryption(),
-)
-
-# 5) Firmar el JWT con RS256
-token = jwt.encode(claims, private_pem, algorithm="RS256", headers={"kid": KID})
+# 4) Firmar el JWT (PyJWT acepta directamente la clave ya cargada)
+token = jwt.encode(claims, key, algorithm=ALG, headers={"kid": KID})
 print(token)
 
@@ -1,24 +1,30 @@
-"""Seed the local database with demo data for the AidDiag MVP."""
+"""Seed the local database with demo data for the AidDiag MVP.
+
+Run from the repository root as ``python -m scripts.seed_demo``.
+"""
 
 from __future__ import annotations
 
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import os
 import sys
-from typing import Dict
-
-import hashlib
+import uuid
+from typing import Dict, List, Sequence, Tuple
 
 try:  # pragma: no cover
     import bcrypt  # type: ignore
 except ImportError:  # pragma: no cover
     bcrypt = None
 
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.append(ROOT_DIR)
+from sqlalchemy import column, exists, func, insert, literal, select, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
 
-from app import models  # noqa: E402
-from app.db import SessionLocal  # noqa: E402
+from app import models
+from app.db import SessionLocal
+from app.routers.auth import _hash_password
 
 DEFAULT_TENANT_NAME = os.getenv("DEFAULT_TENANT_NAME", "demo")
 
@@ -28,93 +34,180 @@ USERS_TO_CREATE = [
     {"email": os.getenv("PATIENT_EMAIL", "patient@demo.local"), "password": os.getenv("PATIENT_PASSWORD", "Patient123!"), "role": "Paciente"},
 ]
 
-
-_FALLBACK_PREFIX = "sha256$"
-
-
-def _hash_password(password: str) -> str:
-    if bcrypt is None:
-        digest = hashlib.sha256(password.encode("utf-8")).hexdigest()
-        return f"{_FALLBACK_PREFIX}{digest}"
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
-
-
-def main() -> None:
-    session = SessionLocal()
-    try:
-        tenant = session.query(models.Tenant).filter(models.Tenant.name == DEFAULT_TENANT_NAME).first()
-        if not tenant:
-            tenant = models.Tenant(name=DEFAULT_TENANT_NAME)
-            session.add(tenant)
-            session.commit()
-            session.refresh(tenant)
-            print(f"Created tenant '{tenant.name}' ({tenant.id})")
+ROLE_NAMES = ["Paciente", "Profesional", "Admin"]
+
+# Row payloads derived from the constants above, built once at import.
+ROLE_ROWS = [{"name": role_name, "description": f"Rol {role_name}"} for role_name in ROLE_NAMES]
+SEED_EMAILS_LOWER = [user_data["email"].lower() for user_data in USERS_TO_CREATE]
+
+
+# Demo passwords do not need production-grade cost; bcrypt stores the cost in
+# the hash, so the API verifies these the same as any other. Kept separate from
+# the API's own cost, which is fixed.
+SEED_BCRYPT_ROUNDS = int(os.getenv("SEED_BCRYPT_ROUNDS", "4"))
+
+
+def _seed_already_applied(session: Session, tenant_id: uuid.UUID) -> bool:
+    """Return True when the demo roles, users and a case already exist for the tenant."""
+
+    roles_count = (
+        select(func.count()).select_from(models.Role).where(models.Role.name.in_(ROLE_NAMES)).scalar_subquery()
+    )
+    users_count = (
+        select(func.count())
+        .select_from(models.User)
+        .where(models.User.tenant_id == tenant_id, func.lower(models.User.email).in_(SEED_EMAILS_LOWER))
+        .scalar_subquery()
+    )
+    has_case = exists().where(models.Case.tenant_id == tenant_id)
+    roles_found, users_found, case_found = session.execute(select(roles_count, users_count, has_case)).one()
+    return roles_found == len(ROLE_NAMES) and users_found == len(USERS_TO_CREATE) and case_found
+
+
+def _seed_cases(
+    session: Session, tenant_id: uuid.UUID, pairs: Sequence[Tuple[uuid.UUID, uuid.UUID]]
+) -> List[uuid.UUID]:
+    """Open a case for each ``(patient_id, assigned_to)`` pair that has none; return the new ids."""
+
+    # One INSERT ... SELECT FROM (VALUES ...) WHERE NOT EXISTS for every pair: the
+    # existence check and the inserts share a statement however many cases are seeded.
+    case_columns = models.Case.__table__.c
+    demo_cases = values(
+        column("patient_id", case_columns.patient_id.type),
+        column("assigned_to", case_columns.assigned_to.type),
+        name="demo_cases",
+    ).data(list(pairs))
+    new_cases = select(
+        literal(tenant_id, case_columns.tenant_id.type),
+        demo_cases.c.patient_id,
+        demo_cases.c.assigned_to,
+        literal("open", case_columns.status.type),
+    ).where(
+        ~exists().where(
+            models.Case.tenant_id == tenant_id,
+            models.Case.patient_id == demo_cases.c.patient_id,
+            models.Case.assigned_to == demo_cases.c.assigned_to,
+        )
+    )
+    return list(
+        session.execute(
+            insert(models.Case)
+            .from_select(["tenant_id", "patient_id", "assigned_to", "status"], new_cases)
+            .returning(models.Case.id)
+        ).scalars()
+    )
+
+
+def _seed_rows(session: Session, tenant_id: uuid.UUID, log: List[str]) -> None:
+    """Create whichever demo roles, users and case are missing for the tenant."""
+
+    # Missing rows are inserted in bulk (roles through ON CONFLICT DO NOTHING)
+    # and re-read once, instead of a commit + refresh per entity.
+    created_roles = session.execute(
+        pg_insert(models.Role)
+        .values(ROLE_ROWS)
+        .on_conflict_do_nothing(index_elements=[models.Role.name])
+        .returning(models.Role.name)
+    ).scalars()
+    for role_name in created_roles:
+        log.append(f"Created role {role_name}")
+    roles: Dict[str, models.Role] = {
+        role.name: role
+        for role in session.query(models.Role).filter(models.Role.name.in_(ROLE_NAMES)).all()
+    }
+
+    existing_users = {
+        user.email.lower(): user
+        for user in session.query(models.User).filter(
+            models.User.tenant_id == tenant_id,
+            func.lower(models.User.email).in_(SEED_EMAILS_LOWER),
+        )
+    }
+    created_users: Dict[str, models.User] = {}
+    missing_users = []
+    for user_data in USERS_TO_CREATE:
+        existing = existing_users.get(user_data["email"].lower())
+        if existing:
+            log.append(f"User {existing.email} already exists (id={existing.id})")
+            created_users[user_data["role"]] = existing
         else:
-            print(f"Using existing tenant '{tenant.name}' ({tenant.id})")
-
-        role_names = ["Paciente", "Profesional", "Admin"]
-        roles: Dict[str, models.Role] = {}
-        for role_name in role_names:
-            role = session.query(models.Role).filter(models.Role.name == role_name).first()
-            if not role:
-                role = models.Role(name=role_name, description=f"Rol {role_name}")
-                session.add(role)
-                session.commit()
-                session.refresh(role)
-                print(f"Created role {role.name}")
-            roles[role_name] = role
-
-        created_users: Dict[str, models.User] = {}
-        for user_data in USERS_TO_CREATE:
-            existing = (
-                session.query(models.User)
-                .filter(models.User.tenant_id == tenant.id, models.User.email == user_data["email"])
-                .first()
-            )
-            if existing:
-                print(f"User {existing.email} already exists (id={existing.id})")
-                created_users[user_data["role"]] = existing
-                continue
-            user = models.User(
-                tenant_id=tenant.id,
-                email=user_data["email"],
-                hashed_password=_hash_password(user_data["password"]),
+            missing_users.append(user_data)
+
+    if missing_users:
+        # bcrypt and hashlib.scrypt release the GIL, so threads hash in parallel.
+        # Demo accounts share one salt (and, with bcrypt, the seed's cost);
+        # never do this for real users.
+        shared_salt = bcrypt.gensalt(rounds=SEED_BCRYPT_ROUNDS) if bcrypt else os.urandom(16)
+        hash_password = partial(_hash_password, salt=shared_salt)
+        with ThreadPoolExecutor(max_workers=len(missing_users)) as executor:
+            hashes = list(executor.map(hash_password, [user_data["password"] for user_data in missing_users]))
+        users_payload = [
+            {"tenant_id": tenant_id, "email": user_data["email"], "hashed_password": hashed}
+            for user_data, hashed in zip(missing_users, hashes)
+        ]
+        session.bulk_insert_mappings(models.User, users_payload)
+        # Filter on lower(email) so the lookup is served by uq_users_tenant_email_ci.
+        new_users = {
+            user.email.lower(): user
+            for user in session.query(models.User).filter(
+                models.User.tenant_id == tenant_id,
+                func.lower(models.User.email).in_([row["email"].lower() for row in users_payload]),
             )
-            user.roles.append(roles[user_data["role"]])
-            session.add(user)
-            session.commit()
-            session.refresh(user)
+        }
+        session.execute(
+            models.UserRole.__table__.insert(),
+            [
+                {"user_id": new_users[user_data["email"].lower()].id, "role_id": roles[user_data["role"]].id}
+                for user_data in missing_users
+            ],
+        )
+        for user_data in missing_users:
+            user = new_users[user_data["email"].lower()]
             created_users[user_data["role"]] = user
-            print(f"Created user {user.email} ({user.roles[0].name}) id={user.id}")
-
-        prof_user = created_users.get("Profesional")
-        patient_user = created_users.get("Paciente")
-        if prof_user and patient_user:
-            existing_case = (
-                session.query(models.Case)
-                .filter(
-                    models.Case.tenant_id == tenant.id,
-                    models.Case.assigned_to == prof_user.id,
-                    models.Case.patient_id == patient_user.id,
-                )
-                .first()
+            log.append(f"Created user {user.email} ({user_data['role']}) id={user.id}")
+
+    prof_user = created_users.get("Profesional")
+    patient_user = created_users.get("Paciente")
+    if prof_user and patient_user:
+        case_ids = _seed_cases(session, tenant_id, [(patient_user.id, prof_user.id)])
+        for case_id in case_ids:
+            log.append(f"Created demo case {case_id}")
+        if not case_ids:
+            log.append("Demo case already exists")
+
+
+def main(force: bool = False) -> None:
+    # Progress lines are written once, after the commit, rather than per row.
+    log: List[str] = []
+    # One transaction for the whole seed: it commits when the block exits and
+    # rolls back if any step fails.
+    with SessionLocal.begin() as session:
+        # The tenant is upserted with ON CONFLICT DO NOTHING: RETURNING only yields
+        # an id when the row was actually created.
+        new_tenant_id = session.execute(
+            pg_insert(models.Tenant)
+            .values(name=DEFAULT_TENANT_NAME)
+            .on_conflict_do_nothing(index_elements=[models.Tenant.name])
+            .returning(models.Tenant.id)
+        ).scalar_one_or_none()
+        if new_tenant_id:
+            tenant_id = new_tenant_id
+            log.append(f"Created tenant '{DEFAULT_TENANT_NAME}' ({tenant_id})")
+        else:
+            tenant_id = (
+                session.query(models.Tenant.id).filter(models.Tenant.name == DEFAULT_TENANT_NAME).scalar()
             )
-            if not existing_case:
-                case = models.Case(
-                    tenant_id=tenant.id,
-                    patient_id=patient_user.id,
-                    assigned_to=prof_user.id,
-                    status="open",
-                )
-                session.add(case)
-                session.commit()
-                print(f"Created demo case {case.id}")
-            else:
-                print(f"Demo case already exists ({existing_case.id})")
-
-        session.commit()
-        print("Seed completed.")
-    finally:
-        session.close()
+            log.append(f"Using existing tenant '{DEFAULT_TENANT_NAME}' ({tenant_id})")
+
+        # A warm re-run costs one extra SELECT instead of the full pass below.
+        if not force and not new_tenant_id and _seed_already_applied(session, tenant_id):
+            log.append("Seed already applied; run with --force to check every row again.")
+        else:
+            _seed_rows(session, tenant_id, log)
+
+    log.append("Seed completed.")
+    sys.stdout.write("\n".join(log) + "\n")
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Seed the local database with AidDiag demo data.")
+    parser.add_argument("--force", action="store_true", help="re-check every row even if the seed looks complete")
+    main(force=parser.parse_args().force)
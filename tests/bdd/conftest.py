@@ -0,0 +1,150 @@
+"""Infraestructura y pasos compartidos por los escenarios BDD contra la API."""
+
+from __future__ import annotations
+
+import atexit
+from functools import lru_cache
+import json
+import os
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+import pytest
+import requests
+from pytest_bdd import given, parsers, then
+from requests.adapters import HTTPAdapter
+
+try:  # pragma: no cover - opcional, solo para el modo grabado
+    import vcr  # type: ignore
+except ImportError:  # pragma: no cover
+    vcr = None
+
+
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
+
+# Modo grabado (opt-in): con BDD_VCR_RECORD_MODE=once la primera ejecución graba
+# las respuestas de la API en un cassette y las siguientes las reproducen sin red.
+VCR_RECORD_MODE = os.getenv("BDD_VCR_RECORD_MODE")
+VCR_CASSETTE = Path(__file__).parent / "cassettes" / "auth.yaml"
+# Campos de los cuerpos JSON que nunca deben quedar grabados en claro.
+_SECRET_FIELDS = ("password", "token", "refresh_token", "access_token", "id_token")
+# Los emails de registro llevan un sufijo aleatorio; se fija para que el cassette
+# siga casando al reproducirse.
+_SIGNUP_EMAIL_RE = re.compile(r"(bdd-)[0-9a-f]{12}(?=@)", re.IGNORECASE)
+
+# Una sola sesión para todos los pasos: reutiliza las conexiones keep-alive en
+# lugar de abrir una nueva (y repetir el handshake TLS) en cada request.
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+atexit.register(SESSION.close)
+
+ApiCall = Callable[..., requests.Response]
+
+
+def _call_api(method: str, path: str, **kwargs: Any) -> requests.Response:
+    kwargs.setdefault("timeout", 10)
+    return SESSION.request(method, f"{API_BASE_URL}{path}", **kwargs)
+
+
+def _scrub_body(body: Any) -> Any:
+    if not body:
+        return body
+    raw = body.decode("utf-8") if isinstance(body, bytes) else body
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return body
+    if not isinstance(data, dict):
+        return body
+    for field in _SECRET_FIELDS:
+        if field in data:
+            data[field] = "REDACTED"
+    scrubbed = _SIGNUP_EMAIL_RE.sub(r"\g<1>000000000000", json.dumps(data))
+    return scrubbed.encode("utf-8") if isinstance(body, bytes) else scrubbed
+
+
+def _scrub_request(request: Any) -> Any:
+    # vcrpy aplica este filtro también a las requests en vivo antes de casarlas,
+    # así que el cassette y la ejecución comparan los mismos cuerpos saneados.
+    request.body = _scrub_body(request.body)
+    return request
+
+
+def _scrub_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    response["body"]["string"] = _scrub_body(response["body"]["string"])
+    return response
+
+
+def _same_if_none_match(live: Any, recorded: Any) -> None:
+    # Distingue el GET condicional (304) del GET inicial (200) a la misma URL.
+    assert live.headers.get("If-None-Match") == recorded.headers.get("If-None-Match")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def recorded_api() -> Iterator[None]:
+    """Activa el cassette de vcrpy cuando BDD_VCR_RECORD_MODE está definido."""
+
+    if not VCR_RECORD_MODE:
+        yield
+        return
+    if vcr is None:
+        pytest.fail("BDD_VCR_RECORD_MODE requiere vcrpy (pip install vcrpy)")
+    # Con pytest-xdist todos los workers escribirían a la vez en el mismo
+    # cassette y lo corromperían: en paralelo solo se permite reproducir.
+    replay_only = VCR_RECORD_MODE == "none" or (VCR_RECORD_MODE == "once" and VCR_CASSETTE.exists())
+    if os.getenv("PYTEST_XDIST_WORKER") and not replay_only:
+        pytest.fail("Graba el cassette sin -n (pytest-xdist); en paralelo solo se puede reproducir")
+    recorder = vcr.VCR(
+        record_mode=VCR_RECORD_MODE,
+        match_on=["method", "uri", "body", "if_none_match"],
+        filter_headers=["authorization"],
+        before_record_request=_scrub_request,
+        before_record_response=_scrub_response,
+    )
+    recorder.register_matcher("if_none_match", _same_if_none_match)
+    with recorder.use_cassette(str(VCR_CASSETTE), allow_playback_repeats=True):
+        yield
+
+
+@pytest.fixture(scope="session")
+def api() -> ApiCall:
+    """Cliente HTTP de los pasos: ``api("GET", "/ruta", **kwargs)`` contra API_BASE_URL."""
+
+    return _call_api
+
+
+@pytest.fixture
+def context() -> Dict[str, Any]:
+    """Contenedor simple para compartir datos entre pasos."""
+
+    return {}
+
+
+def _signin_token(email: str, password: str) -> str:
+    response = _call_api("POST", "/api/v1/auth/signin", json={"email": email, "password": password})
+    assert response.status_code == 200, f"Signin falló: {response.text}"
+    token = response.json().get("token")
+    assert token, "El response no contiene token"
+    return token
+
+
+# Memo por proceso: cada par de credenciales hace un único signin por sesión.
+_demo_token = lru_cache(maxsize=None)(_signin_token)
+
+
+@given(
+    parsers.parse('obtengo un token con email "{email}" y password "{password}"'),
+)
+def obtener_token(context: Dict[str, Any], email: str, password: str) -> None:
+    # BDD_FRESH_TOKEN=1 fuerza un signin por escenario para aislarlos por completo.
+    get_token = _signin_token if os.getenv("BDD_FRESH_TOKEN") else _demo_token
+    context["token"] = get_token(email, password)
+
+
+@then(parsers.parse("la respuesta tiene código {code:d}"))
+def respuesta_codigo(context: Dict[str, Any], code: int) -> None:
+    response = context.get("response")
+    assert response is not None, "No hay response en contexto"
+    assert response.status_code == code, f"Código inesperado: {response.status_code}, body: {response.text}"
@@ -12,3 +12,16 @@ Feature: Autenticación AidDiag
     When hago POST a "/api/v1/auth/refresh" con el token obtenido
     Then la respuesta tiene código 200
     And la respuesta contiene un campo "token"
+
+  Scenario: JWKS sin cambios responde 304
+    When hago GET a "/jwks.json"
+    Then la respuesta tiene código 200
+    When repito el GET a "/jwks.json" enviando su ETag como débil dentro de una lista
+    Then la respuesta tiene código 304
+
+  Scenario: Registro repetido con el email en otras mayúsculas
+    Given un email de registro nuevo
+    When me registro con ese email en minúsculas
+    Then la respuesta tiene código 201
+    When me registro con ese email en mayúsculas
+    Then la respuesta tiene código 409
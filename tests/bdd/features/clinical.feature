@@ -0,0 +1,11 @@
+Feature: Listados clínicos AidDiag
+
+  Scenario: Listados de síntomas y predicciones sin cargas perezosas
+    Given obtengo un token con email "patient@demo.local" y password "Patient123!"
+    And registro un síntoma y su predicción para mi paciente
+    When hago GET autenticado a "/api/v1/symptoms" para mi paciente
+    Then la respuesta tiene código 200
+    And la lista contiene al menos un elemento
+    When hago GET autenticado a "/api/v1/predictions" para mi paciente
+    Then la respuesta tiene código 200
+    And la lista contiene al menos un elemento
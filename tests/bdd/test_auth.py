@@ -1,31 +1,17 @@
 from __future__ import annotations
 
-import os
-from typing import Any, Dict
+import uuid
+from typing import Any, Callable, Dict
 
-import pytest
 import requests
-from pytest_bdd import given, scenario, then, when
+from pytest_bdd import given, parsers, scenarios, then, when
 
+# Firma del fixture ``api`` definido en conftest.py.
+ApiCall = Callable[..., requests.Response]
 
-API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 
-
-@scenario("features/auth.feature", "Login con credenciales válidas")
-def test_login_valido() -> None:
-    """Escenario BDD: Login con credenciales válidas."""
-
-
-@scenario("features/auth.feature", "Refresh de token válido")
-def test_refresh_valido() -> None:
-    """Escenario BDD: Refresh de token válido."""
-
-
-@pytest.fixture
-def context() -> Dict[str, Any]:
-    """Contenedor simple para compartir datos entre pasos."""
-
-    return {}
+# Registra todos los escenarios del feature con un único parseo del archivo.
+scenarios("features/auth.feature")
 
 
 @given("un usuario demo existente")
@@ -37,51 +23,46 @@ def usuario_demo() -> None:
 
 
 @when(
-    'hago POST a "/api/v1/auth/signin" con email "patient@demo.local" y password "Patient123!"',
+    parsers.parse('hago POST a "{path}" con email "{email}" y password "{password}"'),
 )
-def post_signin(context: Dict[str, Any]) -> None:
-    response = requests.post(
-        f"{API_BASE_URL}/api/v1/auth/signin",
-        json={"email": "patient@demo.local", "password": "Patient123!"},
-        timeout=10,
-    )
-    context["response"] = response
+def post_signin(context: Dict[str, Any], api: ApiCall, path: str, email: str, password: str) -> None:
+    context["response"] = api("POST", path, json={"email": email, "password": password})
 
 
 @when(
-    'hago POST a "/api/v1/auth/refresh" con el token obtenido',
+    parsers.parse('hago POST a "{path}" con el token obtenido'),
 )
-def post_refresh(context: Dict[str, Any]) -> None:
+def post_refresh(context: Dict[str, Any], api: ApiCall, path: str) -> None:
     token = context.get("token")
     assert token, "Se esperaba un token previo en el contexto"
-    response = requests.post(
-        f"{API_BASE_URL}/api/v1/auth/refresh",
-        json={"refresh_token": token},
-        timeout=10,
-    )
-    context["response"] = response
+    context["response"] = api("POST", path, json={"refresh_token": token})
 
 
-@given(
-    'obtengo un token con email "patient@demo.local" y password "Patient123!"',
-)
-def obtener_token(context: Dict[str, Any]) -> None:
-    response = requests.post(
-        f"{API_BASE_URL}/api/v1/auth/signin",
-        json={"email": "patient@demo.local", "password": "Patient123!"},
-        timeout=10,
+@given("un email de registro nuevo")
+def email_nuevo(context: Dict[str, Any]) -> None:
+    context["signup_email"] = f"bdd-{uuid.uuid4().hex[:12]}@demo.local"
+
+
+@when(parsers.parse("me registro con ese email en {caso}"))
+def post_signup(context: Dict[str, Any], api: ApiCall, caso: str) -> None:
+    email = context["signup_email"]
+    context["response"] = api(
+        "POST",
+        "/api/v1/auth/signup",
+        json={"email": email.upper() if caso == "mayúsculas" else email, "password": "Signup123!"},
     )
-    assert response.status_code == 200, f"Signin falló: {response.text}"
-    token = response.json().get("token")
-    assert token, "El response no contiene token"
-    context["token"] = token
 
 
-@then("la respuesta tiene código 200")
-def respuesta_200(context: Dict[str, Any]) -> None:
-    response = context.get("response")
-    assert response is not None, "No hay response en contexto"
-    assert response.status_code == 200, f"Código inesperado: {response.status_code}, body: {response.text}"
+@when(parsers.parse('hago GET a "{path}"'))
+def get_path(context: Dict[str, Any], api: ApiCall, path: str) -> None:
+    context["response"] = api("GET", path)
+
+
+@when(parsers.parse('repito el GET a "{path}" enviando su ETag como débil dentro de una lista'))
+def get_path_if_none_match(context: Dict[str, Any], api: ApiCall, path: str) -> None:
+    etag = context["response"].headers.get("ETag")
+    assert etag, "La respuesta previa no trae ETag"
+    context["response"] = api("GET", path, headers={"If-None-Match": f'"otro", W/{etag}'})
 
 
 @then('la respuesta contiene un campo "token"')
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict
+
+import requests
+from pytest_bdd import given, parsers, scenarios, then, when
+
+# Firma del fixture ``api`` definido en conftest.py.
+ApiCall = Callable[..., requests.Response]
+
+# Los listados cargan las filas con raiseload("*"): si la serialización tocara
+# una relación no cargada la API respondería 500, así que estos escenarios
+# fallan ante cualquier lazy load introducido en los handlers o esquemas.
+scenarios("features/clinical.feature")
+
+
+def _auth(context: Dict[str, Any]) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {context['token']}"}
+
+
+@given("registro un síntoma y su predicción para mi paciente")
+def registrar_sintoma_y_prediccion(context: Dict[str, Any], api: ApiCall) -> None:
+    me = api("GET", "/api/v1/auth/me", headers=_auth(context))
+    assert me.status_code == 200, f"/auth/me falló: {me.text}"
+    patient_id = me.json()["user"]["id"]
+    context["patient_id"] = patient_id
+
+    symptom = api(
+        "POST",
+        "/api/v1/symptoms",
+        json={"patient_id": patient_id, "payload": {"fever": True, "cough": True}},
+        headers=_auth(context),
+    )
+    assert symptom.status_code == 201, f"POST /symptoms falló: {symptom.text}"
+    prediction = api(
+        "POST",
+        "/api/v1/predict",
+        json={"patient_id": patient_id, "symptom_entry_id": symptom.json()["id"]},
+        headers=_auth(context),
+    )
+    assert prediction.status_code == 200, f"POST /predict falló: {prediction.text}"
+
+
+@when(parsers.parse('hago GET autenticado a "{path}" para mi paciente'))
+def get_listado(context: Dict[str, Any], api: ApiCall, path: str) -> None:
+    context["response"] = api(
+        "GET",
+        path,
+        params={"patient_id": context["patient_id"], "include_total": "true"},
+        headers=_auth(context),
+    )
+
+
+@then("la lista contiene al menos un elemento")
+def lista_no_vacia(context: Dict[str, Any]) -> None:
+    body = context["response"].json()
+    assert body["items"], f"Se esperaban elementos en el listado: {body}"
@@ -0,0 +1,32 @@
+"""Comprueba que ninguna ruta verifica el JWT más de una vez por request."""
+
+from __future__ import annotations
+
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+
+from app.auth import Auth
+from app.main import app
+
+# Rutas que no exigen un bearer token.
+PUBLIC_ROUTES = {
+    ("POST", "/api/v1/auth/signup"),
+    ("POST", "/api/v1/auth/signin"),
+    ("POST", "/api/v1/auth/refresh"),
+    ("GET", "/health"),
+    ("GET", "/jwks.json"),
+}
+
+
+def _count_auth(dependant: Dependant) -> int:
+    return sum(isinstance(sub.call, Auth) + _count_auth(sub) for sub in dependant.dependencies)
+
+
+def test_cada_ruta_autenticada_resuelve_un_solo_auth() -> None:
+    routes = [route for route in app.routes if isinstance(route, APIRoute)]
+    assert routes, "La app no expone rutas"
+    for route in routes:
+        for method in route.methods:
+            expected = 0 if (method, route.path) in PUBLIC_ROUTES else 1
+            found = _count_auth(route.dependant)
+            assert found == expected, f"{method} {route.path}: {found} dependencias Auth, se esperaba {expected}"